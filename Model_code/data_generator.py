@@ -1,5 +1,6 @@
 import numpy as np
 import h5py
+import hdf5plugin     # Registers the Blosc2 filter used by the feature files
 import csv
 import time
 import logging
@@ -8,7 +9,7 @@ import glob
 import matplotlib.pyplot as plt
 import logging
 
-from utilities import scale
+from utilities import scale, read_target
 import config
 
 
@@ -89,12 +90,12 @@ class DataGenerator(object):
             data_dict['feature'] = hf['feature'][:].astype(np.float32)
             
             if 'weak_target' in hf.keys():
-                data_dict['weak_target'] = \
-                    hf['weak_target'][:].astype(np.float32)
+                data_dict['weak_target'] = read_target(
+                    hf['weak_target'][:], config.classes_num).astype(np.float32)
                 
             if 'strong_target' in hf.keys():
-                data_dict['strong_target'] = \
-                    hf['strong_target'][:].astype(np.float32)
+                data_dict['strong_target'] = read_target(
+                    hf['strong_target'][:], config.classes_num).astype(np.float32)
             
         return data_dict
         
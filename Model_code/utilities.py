@@ -139,6 +139,37 @@ def inverse_scale(x, mean, std):
     return x * std + mean
 
 
+def unpack_target(packed, classes_num):
+    '''Unpack targets stored bit-packed along the classes axis. 
+    
+    Args:
+      packed: (..., ceil(classes_num / 8)), uint8
+      classes_num: int
+      
+    Returns:
+      target: (..., classes_num), bool
+    '''
+    return np.unpackbits(packed, axis=-1, count=classes_num).astype(np.bool)
+
+
+def read_target(target, classes_num):
+    '''Read targets that are either bit-packed, see unpack_target, or stored 
+    as bool by older feature files and the other feature writers. 
+    
+    Args:
+      target: (..., ceil(classes_num / 8)), uint8 | (..., classes_num), bool
+      classes_num: int
+      
+    Returns:
+      target: (..., classes_num)
+    '''
+    if target.dtype == np.uint8 and \
+        target.shape[-1] == int(math.ceil(classes_num / 8.)):
+        return unpack_target(target, classes_num)
+    else:
+        return target
+
+
 def read_metadata(metadata_path):
 #     '''Read metadata csv file. 
 #     
@@ -2,19 +2,16 @@ import os
 import sys
 sys.path.insert(1, os.path.join(sys.path[0], 'utils'))
 import numpy as np
-import argparse
 import h5py
-import librosa
-from scipy import signal
-import matplotlib.pyplot as plt
+import hdf5plugin
 import time
 import math
-import pandas as pd
-import random
-from moviepy.editor import VideoFileClip
-import cv2
+import itertools
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+# librosa, pyfftw, ffmpegcv and blosc2 are imported where they are used, so 
+# that calculate_scalar starts without loading them
 
-from utilities import (create_folder, read_audio, calculate_scalar_of_tensor, 
+from utilities import (create_folder, read_audio, calculate_scalar_of_dataset, 
     pad_truncate_sequence, get_relative_path_no_extension, read_metadata, isnan)
 import config
 
@@ -34,7 +31,9 @@ class LogMelExtractor(object):
         
         self.window_size = window_size
         self.hop_size = hop_size
-        self.window_func = np.hanning(window_size)
+        self.window_func = np.hanning(window_size).astype(np.float32)
+        
+        import librosa
         
         self.melW = librosa.filters.mel(
             sr=sample_rate, 
@@ -43,6 +42,42 @@ class LogMelExtractor(object):
             fmin=fmin, 
             fmax=fmax).T
         '''(n_fft // 2 + 1, mel_bins)'''
+        
+        # FFTW plan and scratch buffers, allocated on first use and reused 
+        # for every audio file of the same length
+        self.frames_num = None
+        self.fft = None
+        self.frames_buffer = None
+        self.power_buffer = None
+        self.mel_buffer = None
+
+    def allocate(self, frames_num):
+        '''Build the FFTW plan of the real FFT of (frames_num, window_size) 
+        frames, if pyfftw is available, and the scratch buffers of the 
+        windowed frames, power and mel spectrograms. 
+        '''
+        self.frames_num = frames_num
+        
+        try:
+            import pyfftw
+        except ImportError:     # Fall back to a batched numpy rfft
+            pyfftw = None
+        
+        if pyfftw is not None:
+            self.fft = pyfftw.builders.rfft(
+                pyfftw.empty_aligned((frames_num, self.window_size), dtype='float32'), 
+                axis=-1, 
+                threads=1,     # Files are already processed one per core
+                planner_effort='FFTW_MEASURE')
+            self.frames_buffer = self.fft.input_array
+        else:
+            self.frames_buffer = np.empty(
+                (frames_num, self.window_size), dtype=np.float32)
+            
+        self.power_buffer = np.empty(
+            (frames_num, self.window_size // 2 + 1), dtype=np.float32)
+        self.mel_buffer = np.empty(
+            (frames_num, self.melW.shape[1]), dtype=np.float32)
 
     def transform(self, audio):
         '''Extract feature of a singlechannel audio file. 
@@ -51,72 +86,131 @@ class LogMelExtractor(object):
           audio: (samples,)
           
         Returns:
-          feature: (frames_num, freq_bins)
+          feature: (frames_num, freq_bins), a buffer that is overwritten by 
+            the next call
         '''
     
         window_size = self.window_size
         hop_size = self.hop_size
         window_func = self.window_func
         
-        # Compute short-time Fourier transform
-        stft_matrix = librosa.core.stft(
-            y=audio, 
-            n_fft=window_size, 
-            hop_length=hop_size, 
-            window=window_func, 
-            center=True, 
-            dtype=np.complex64, 
-            pad_mode='reflect').T
+        # Pad and split audio into frames the same way as librosa.core.stft 
+        # with center=True
+        padded_audio = np.pad(audio, window_size // 2, mode='reflect')
+        frames = np.lib.stride_tricks.sliding_window_view(
+            padded_audio, window_size)[::hop_size]
+        '''(N, n_fft)'''
+        
+        if frames.shape[0] != self.frames_num:
+            self.allocate(frames.shape[0])
+            
+        # Compute short-time Fourier transform of all frames in one batched 
+        # real FFT, windowing the frames directly into its input buffer
+        np.multiply(frames, window_func, out=self.frames_buffer)
+        
+        if self.fft is not None:
+            stft_matrix = self.fft()
+        else:
+            stft_matrix = np.fft.rfft(self.frames_buffer, axis=-1).astype(
+                np.complex64, copy=False)
         '''(N, n_fft // 2 + 1)'''
     
+        # Power spectrogram from the real and imaginary parts, skipping the 
+        # sqrt of np.abs
+        power_spectrogram = np.add(
+            np.square(stft_matrix.real), 
+            np.square(stft_matrix.imag), 
+            out=self.power_buffer)
+    
         # Mel spectrogram
-        mel_spectrogram = np.dot(np.abs(stft_matrix) ** 2, self.melW)
-        
-        # Log mel spectrogram
-        logmel_spectrogram = librosa.core.power_to_db(
-            mel_spectrogram, ref=1.0, amin=1e-10, 
-            top_db=None)
+        mel_spectrogram = np.dot(power_spectrogram, self.melW, out=self.mel_buffer)
         
-        logmel_spectrogram = logmel_spectrogram.astype(np.float32)
+        # Log mel spectrogram, same as librosa.core.power_to_db with ref=1.0, 
+        # amin=1e-10 and top_db=None, computed in place
+        logmel_spectrogram = np.log10(
+            np.maximum(mel_spectrogram, 1e-10, out=mel_spectrogram), 
+            out=mel_spectrogram)
+        logmel_spectrogram *= 10.
         
         return logmel_spectrogram
 
 
 class VideoFeatureExtractor(object):
-    def __init__(self, video_fps):
+    def __init__(self, video_fps, use_nvidia=False):
+        '''Video feature extractor. 
+        
+        Args:
+          video_fps: int
+          use_nvidia: bool, decode with NVDEC instead of on CPU
+        '''
         self.video_fps = video_fps
+        self.use_nvidia = use_nvidia
+
+    def open_video(self, filename, width, height, color=True):
+        '''Open a video with ffmpegcv so that decoding and resizing to 
+        (width, height) both happen inside the ffmpeg filter graph. Decodes 
+        with NVDEC if use_nvidia is set, otherwise on CPU. 
+        '''
+        import ffmpegcv
+        
+        kwargs = dict(
+            pix_fmt='bgr24' if color else 'gray', 
+            resize=(height, width), 
+            resize_keepratio=False)
+
+        if self.use_nvidia:
+            return ffmpegcv.VideoCaptureNV(filename, **kwargs)
+        else:
+            return ffmpegcv.VideoCapture(filename, **kwargs)
 
     def video3d_frames(self, filename, width, height, depth, color=True, skip=True):
-        cap = cv2.VideoCapture(filename)
-        nframe = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+        cap = self.open_video(filename, width, height, color=color)
+        nframe = len(cap)
         print("Total no of frame:", nframe)
     
         if skip:
-            frames = [x * nframe / depth for x in range(depth)]
+            frames = np.unique(np.linspace(
+                0, max(int(nframe), 1) - 1, depth).astype(np.int64))
         else:
-            frames = [x for x in range(depth)]
+            frames = np.arange(depth)
+            
+        # Short clips have fewer distinct frames than depth, repeat the last one
+        if len(frames) < depth:
+            frames = np.concatenate((frames, np.repeat(frames[-1], depth - len(frames))))
         print("The no of frame to process:", len(frames))
 
-        framearray = []
-        for i in range(depth):
-            cap.set(cv2.CAP_PROP_POS_FRAMES, frames[i])
-            ret, frame = cap.read()
-            frame = cv2.resize(frame, (height, width), interpolation=cv2.INTER_CUBIC)
+        # Gather frames directly into the (width, height, depth, channels) 
+        # layout, so no transposed copy is needed before writing to hdf5
+        if color:
+            X = np.zeros((width, height, depth, 3), dtype=np.uint8)
+        else:
+            X = np.zeros((width, height, depth), dtype=np.uint8)
+
+        # Walk the stream sequentially and keep only the sampled frames, 
+        # stopping as soon as the last one has been collected
+        t = 0
+        for (idx, frame) in enumerate(cap):
+            while t < depth and frames[t] == idx:
+                X[:, :, t] = frame
+                t += 1
 
-            if color:
-                framearray.append(frame)
-            else:
-                framearray.append(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+            if t == depth:
+                break
 
         cap.release()
 
-        X = np.array(framearray)    #vid3d.video3d(video_dir, color=color, skip=skip)
+        # The frame count of the container can be larger than the frames that 
+        # can actually be decoded, repeat the last decoded frame in that case
+        if t == 0:
+            raise Exception('No frame could be decoded from {}!'.format(filename))
+            
+        if t < depth:
+            print("Only {} of {} frames decoded, repeat the last one".format(t, depth))
+            X[:, :, t :] = X[:, :, t - 1 : t]
+
         # print(X)
         print("--------------------------------------------------")
-        if color:
-            return np.array(X).transpose((1, 2, 0, 3))
-        else:
-            return np.array(X).transpose((1, 2, 0, 0))
+        return X
 
 def labels_to_target(labels, classes_num, lb_to_idx):
     '''Convert labels to target array. 
@@ -148,16 +242,140 @@ def events_to_target(events, frames_num, classes_num, frames_per_second, lb_to_i
     '''
     target = np.zeros((frames_num, classes_num), dtype=np.bool)
     
-    for event_dict in events:
-        if not isnan(event_dict['event']):
-            class_id = lb_to_idx[event_dict['event']]
-            onset_frame = int(round(event_dict['onset'] * frames_per_second))
-            offset_frame = int(round(event_dict['offset'] * frames_per_second)) +1
-            target[onset_frame : offset_frame, class_id] = 1
+    events = [event_dict for event_dict in events 
+        if not isnan(event_dict['event'])]
+    
+    if len(events) == 0:
+        return target
+    
+    class_ids = np.array([lb_to_idx[event_dict['event']] for event_dict in events])
+    onset_frames = np.rint(np.array(
+        [event_dict['onset'] for event_dict in events]) * frames_per_second).astype(np.int64)
+    offset_frames = np.rint(np.array(
+        [event_dict['offset'] for event_dict in events]) * frames_per_second).astype(np.int64) + 1
+    offset_frames = np.minimum(offset_frames, frames_num)
+    
+    # Flatten all (frame, class) pairs covered by events and set them at once
+    lengths = np.maximum(offset_frames - onset_frames, 0)
+    frame_ids = np.concatenate([np.arange(onset_frame, onset_frame + length) 
+        for (onset_frame, length) in zip(onset_frames, lengths)])
+    target[frame_ids, np.repeat(class_ids, lengths)] = 1
         
     return target
 
  
+def compress_chunk(x):
+    '''Compress one row of a dataset into a Blosc2 frame that can be written 
+    with write_direct_chunk to a dataset created with the Blosc2 filter and 
+    one chunk per row. Uses the same zstd level 3 and shuffle settings as 
+    the dataset filter. 
+    
+    Args:
+      x: ndarray, one row of the dataset
+      
+    Returns:
+      chunk: bytes
+    '''
+    import blosc2
+    
+    array = blosc2.asarray(
+        np.ascontiguousarray(x)[np.newaxis], 
+        chunks=(1,) + x.shape, 
+        cparams={'codec': blosc2.Codec.ZSTD, 'clevel': 3, 
+            'filters': [blosc2.Filter.SHUFFLE], 
+            'nthreads': 1})     # Files are already processed one per core
+        
+    return array.to_cframe()
+    
+
+# Feature extractors and audio buffer of the current worker process, see 
+# init_extractors
+extractors = {}
+
+
+def init_extractors(feature_extractor, video_feature_extractor):
+    '''Keep one copy of the feature extractors per worker process, so that 
+    the FFTW plan and buffers cached on them are reused across files. The 
+    padded audio of every file is also written into one reused buffer. 
+    '''
+    extractors['feature'] = feature_extractor
+    extractors['video_feature'] = video_feature_extractor
+    extractors['audio_buffer'] = np.zeros(config.total_samples, dtype=np.float32)
+
+
+def calculate_feature_for_one_file(n, audio_name, audios_dir, videos_dir, 
+    data, has_weak_labels, has_strong_labels):
+    '''Calculate feature and targets of one audio and video pair. Runs in a 
+    worker process, so nothing is written to the hdf5 file here. 
+    
+    Args:
+      n: int, index of the file in the hdf5 file
+      audio_name: string
+      audios_dir: string
+      videos_dir: string
+      data: dict, metadata of the audio file returned by read_metadata
+      has_weak_labels: bool
+      has_strong_labels: bool
+      
+    Returns:
+      result: {'n': int, 
+               'feature': bytes, compressed (frames_num, mel_bins), 
+               'video_feature': bytes, compressed (video_feature_dim, video_feature_dim, video_fps, 3), uint8, 
+               (if exist) 'weak_target': (packed_classes_num,), 
+               (if exist) 'strong_target': (frames_num, packed_classes_num)}
+    '''
+    sample_rate = config.sample_rate
+    frames_per_second = config.frames_per_second
+    frames_num = config.frames_num
+    total_samples = config.total_samples
+    classes_num = config.classes_num
+    lb_to_idx = config.lb_to_idx
+    video_fps = config.video_fps
+    video_feature_dim = config.video_feature_dim
+
+    audio_path = os.path.join(audios_dir, audio_name)
+    video_path = os.path.join(videos_dir, audio_name.replace('.wav', '.avi'))
+    print(n, audio_path, video_path)
+
+    # Read audio
+    (audio, _) = read_audio(
+        audio_path=audio_path, 
+        target_fs=sample_rate)
+    
+    # Pad or truncate audio recording into the buffer of this worker
+    audio = pad_truncate_sequence(audio, total_samples, 
+        out=extractors['audio_buffer'])
+    
+    # Extract feature
+    feature = extractors['feature'].transform(audio)
+    
+    # Remove the extra frames caused by padding zero
+    feature = feature[0 : frames_num]
+
+    video_feature = extractors['video_feature'].video3d_frames(video_path, video_feature_dim, video_feature_dim, video_fps, color=True, skip=True)
+
+    # Compress features here, so the main process only issues raw chunk writes
+    result = {'n': n, 
+              'feature': compress_chunk(feature), 
+              'video_feature': compress_chunk(video_feature)}
+    
+    # Targets are stored bit-packed along the classes axis, the data generator 
+    # unpacks them with read_target of Model_code/utilities.py
+    if has_weak_labels:
+        result['weak_target'] = np.packbits(labels_to_target(
+            data['weak_labels'], classes_num, lb_to_idx), axis=-1)
+
+    if has_strong_labels:
+        result['strong_target'] = np.packbits(events_to_target(
+            events=data['strong_labels'], 
+            frames_num=frames_num, 
+            classes_num=classes_num, 
+            frames_per_second=frames_per_second, 
+            lb_to_idx=lb_to_idx), axis=-1)
+        
+    return result
+
+
 def calculate_feature_for_all_audio_files():
     '''Calculate feature of audio files and write out features to a single hdf5 
     file. '''
@@ -226,7 +444,9 @@ def calculate_feature_for_all_audio_files():
         fmax=fmax)
     
     
-    video_feature_extractor = VideoFeatureExtractor(video_fps=video_fps)
+    video_feature_extractor = VideoFeatureExtractor(
+        video_fps=video_fps, 
+        use_nvidia=config.video_use_nvidia)
 
     # Read metadata
     (audio_dict, has_weak_labels, has_strong_labels) = read_metadata(metadata_path)
@@ -245,94 +465,159 @@ def calculate_feature_for_all_audio_files():
     print('Extracting features of all audio and video files ...')
     extract_time = time.time()
     
-    # Hdf5 file for storing features and targets
-    hf = h5py.File(feature_path, 'w')
-
-    hf.create_dataset(
-        name='audio_name', 
-        data=[audio_name.encode() for audio_name in audio_names], 
-        dtype='S64')
-
-    hf.create_dataset(
-        name='feature', 
-        shape=(0, frames_num, mel_bins), 
-        maxshape=(None, frames_num, mel_bins), 
-        dtype=np.float32,
-        compression='lzf')
-    
-    hf.create_dataset(
-        name='video_name', 
-        data=[video_name.encode() for video_name in video_names], 
-        dtype='S64')
-    
-    hf.create_dataset(
-        name='video_feature', 
-        shape=(0, video_feature_dim, video_feature_dim, video_fps, 3), 
-        maxshape=(None, video_feature_dim, video_feature_dim, video_fps, 3), 
-        dtype=np.float32,
-        compression='lzf')
-
+    audios_num = len(audio_names)
+    packed_classes_num = int(math.ceil(classes_num / 8.))
+    
+    # Names are stored UTF-8 encoded, as fixed length bytes
+    encoded_audio_names = np.array(
+        [audio_name.encode() for audio_name in audio_names], dtype='S64')
+    encoded_video_names = np.array(
+        [video_name.encode() for video_name in video_names], dtype='S64')
+    
+    # Shape and dtype of the datasets written for each file
+    layouts = {
+        'feature': ((audios_num, frames_num, mel_bins), np.float32), 
+        'video_feature': ((audios_num, video_feature_dim, video_feature_dim, video_fps, 3), np.uint8), 
+        'done': ((audios_num,), np.bool)}
+        
     if has_weak_labels:
-        hf.create_dataset(
-            name='weak_target', 
-            shape=(0, classes_num), 
-            maxshape=(None, classes_num), 
-            dtype=np.bool)
-            
+        layouts['weak_target'] = ((audios_num, packed_classes_num), np.uint8)
+        
     if has_strong_labels:
-        hf.create_dataset(
-            name='strong_target', 
-            shape=(0, frames_num, classes_num), 
-            maxshape=(None, frames_num, classes_num),
-            dtype=np.bool)
-
+        layouts['strong_target'] = ((audios_num, frames_num, packed_classes_num), np.uint8)
+    
+    # Resume an interrupted extraction of the same files with the same 
+    # configuration, skipping the files already marked as done
+    resume = False
+    
+    if os.path.isfile(feature_path):
+        try:
+            with h5py.File(feature_path, 'r') as hf:
+                resume = 'audio_name' in hf.keys() and \
+                    np.array_equal(hf['audio_name'][:], encoded_audio_names) and \
+                    ('weak_target' in hf.keys()) == has_weak_labels and \
+                    ('strong_target' in hf.keys()) == has_strong_labels and \
+                    all(key in hf.keys() and hf[key].shape == shape and hf[key].dtype == dtype 
+                        for (key, (shape, dtype)) in layouts.items()) and \
+                    all(hf[key].chunks == (1,) + layouts[key][0][1 :] 
+                        for key in ['feature', 'video_feature'])
+                    
+        except OSError:
+            # A file left corrupt by a killed run is recreated
+            resume = False
+    
+    hf = h5py.File(feature_path, 'a' if resume else 'w')
+    
+    try:
+        if resume:
+            print('Resume from {} of {} extracted files'.format(
+                np.sum(hf['done'][:]), audios_num))
+    
+        else:
+            # Hdf5 file for storing features and targets. Datasets are allocated 
+            # at full size with one chunk per file, so each write hits one chunk
+            hf.create_dataset(
+                name='audio_name', 
+                data=encoded_audio_names)
+
+            hf.create_dataset(
+                name='feature', 
+                shape=(audios_num, frames_num, mel_bins), 
+                chunks=(1, frames_num, mel_bins), 
+                dtype=np.float32,
+                **hdf5plugin.Blosc2(cname='zstd', clevel=3, filters=hdf5plugin.Blosc2.SHUFFLE))
+    
+            hf.create_dataset(
+                name='video_name', 
+                data=encoded_video_names)
+    
+            hf.create_dataset(
+                name='video_feature', 
+                shape=(audios_num, video_feature_dim, video_feature_dim, video_fps, 3), 
+                chunks=(1, video_feature_dim, video_feature_dim, video_fps, 3), 
+                dtype=np.uint8,
+                **hdf5plugin.Blosc2(cname='zstd', clevel=3, filters=hdf5plugin.Blosc2.SHUFFLE))
+
+            if has_weak_labels:
+                hf.create_dataset(
+                    name='weak_target', 
+                    shape=(audios_num, packed_classes_num), 
+                    chunks=(1, packed_classes_num), 
+                    dtype=np.uint8)
+            
+            if has_strong_labels:
+                hf.create_dataset(
+                    name='strong_target', 
+                    shape=(audios_num, frames_num, packed_classes_num), 
+                    chunks=(1, frames_num, packed_classes_num),
+                    dtype=np.uint8)
+
+            hf.create_dataset(
+                name='done', 
+                shape=(audios_num,), 
+                dtype=np.bool)
+            
+        done = hf['done'][:]
 
-    for (n, audio_name) in enumerate(audio_names):
-        audio_path = os.path.join(audios_dir, audio_name)
-        video_path = os.path.join(videos_dir, audio_name.replace('.wav', '.avi'))
-        print(n, audio_path, video_path)
 
+        # Extract features of each file in worker processes and write them out 
+        # in the main process only, as hdf5 writes are not safe to parallelize. 
+        # At most 2 files per worker are pending at a time, so finished results 
+        # do not pile up in memory
+        workers_num = os.cpu_count()
+        pending_num = 2 * workers_num
+    
+        todo = ((n, audio_name) for (n, audio_name) in enumerate(audio_names) 
+            if not done[n])
+    
+        with ProcessPoolExecutor(max_workers=workers_num, 
+            initializer=init_extractors, 
+            initargs=(feature_extractor, video_feature_extractor)) as executor:
+            pending = set()
         
-        # Read audio
-        (audio, _) = read_audio(
-            audio_path=audio_path, 
-            target_fs=sample_rate)
-        
-        # Pad or truncate audio recording
-        audio = pad_truncate_sequence(audio, total_samples)
-        
-        # Extract feature
-        feature = feature_extractor.transform(audio)
-        
-        # Remove the extra frames caused by padding zero
-        feature = feature[0 : frames_num]
-
-        video_feature = video_feature_extractor.video3d_frames(video_path, video_feature_dim, video_feature_dim, video_fps, color=True, skip=True)
-
-        hf['feature'].resize((n + 1, frames_num, mel_bins))
-        hf['feature'][n] = feature
-
-        # hf.create_dataset('video_feature', data=video_feature, dtype=np.float32)
-        hf['video_feature'].resize((n + 1, video_feature_dim, video_feature_dim, video_fps, 3))
-        hf['video_feature'][n] = video_feature
+            try:
+                while True:
+                    for (n, audio_name) in itertools.islice(todo, pending_num - len(pending)):
+                        pending.add(executor.submit(calculate_feature_for_one_file, 
+                            n=n, 
+                            audio_name=audio_name, 
+                            audios_dir=audios_dir, 
+                            videos_dir=videos_dir, 
+                            data=audio_dict[audio_name], 
+                            has_weak_labels=has_weak_labels, 
+                            has_strong_labels=has_strong_labels))
+                        
+                    if len(pending) == 0:
+                        break
+                    
+                    (finished, pending) = wait(pending, return_when=FIRST_COMPLETED)
+                
+                    for future in finished:
+                        result = future.result()
+                        n = result['n']
+
+                        # Write the compressed chunks directly, bypassing the filter pipeline
+                        hf['feature'].id.write_direct_chunk(
+                            (n, 0, 0), result['feature'])
+                        hf['video_feature'].id.write_direct_chunk(
+                            (n, 0, 0, 0, 0), result['video_feature'])
+            
+                        if has_weak_labels:
+                            hf['weak_target'][n] = result['weak_target']
         
-        if has_weak_labels:
-            weak_labels = audio_dict[audio_name]['weak_labels']
-            hf['weak_target'].resize((n + 1, classes_num))
-            hf['weak_target'][n] = labels_to_target(
-                weak_labels, classes_num, lb_to_idx)
-    
-        if has_strong_labels:
-            events = audio_dict[audio_name]['strong_labels']
-            hf['strong_target'].resize((n + 1, frames_num, classes_num))
-            hf['strong_target'][n] = events_to_target(
-                events=events, 
-                frames_num=frames_num, 
-                classes_num=classes_num, 
-                frames_per_second=frames_per_second, 
-                lb_to_idx=lb_to_idx)
+                        if has_strong_labels:
+                            hf['strong_target'][n] = result['strong_target']
+                
+                        hf['done'][n] = True
+                        hf.flush()
+                    
+            except BaseException:
+                # Do not run the queued files before reporting the error
+                executor.shutdown(wait=True, cancel_futures=True)
+                raise
             
-    hf.close()
+    finally:
+        hf.close()
         
     print('Write hdf5 file to {} using {:.3f} s'.format(feature_path, time.time() - extract_time))
     
@@ -376,17 +661,13 @@ def calculate_scalar():
     load_time = time.time()
     
     with h5py.File(feature_path, 'r') as hf:
-        audio_features = hf['feature'][:]
-        video_features = hf['video_feature'][:] 
-
         # feature_data = np.array(feature_dataset)
         # print("Shape of 'feature' dataset:", feature_data.shape)
 
-        # Calculate scalars for audio and video features separately
-    # features = np.concatenate(features, axis=0)
-    (audio_mean, audio_std) = calculate_scalar_of_tensor(audio_features)
-    # video_features = np.concatenate(video_features, axis=0)
-    (video_mean, video_std) = calculate_scalar_of_tensor(video_features)
+        # Calculate scalars for audio and video features separately, 
+        # streaming over the datasets instead of loading them into memory
+        (audio_mean, audio_std) = calculate_scalar_of_dataset(hf['feature'])
+        (video_mean, video_std) = calculate_scalar_of_dataset(hf['video_feature'])
 
 
     print('Load feature from {}, using {:.3f} s'.format(feature_path, time.time() - load_time))
@@ -32,6 +32,7 @@ fmax = 4660    # Hz
 #for video
 video_fps = 64
 video_feature_dim = 128
+video_use_nvidia = False    # Decode with NVDEC, needs ffmpeg built with the *_cuvid decoders
 
 frames_per_second = sample_rate // hop_size #64 frames per second
 audio_duration = 30   # Audio recordings in DCASE2019 Task4 are all in sec     
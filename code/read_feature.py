@@ -1,4 +1,5 @@
 import h5py
+import hdf5plugin     # Registers the Blosc2 filter used by the feature files
 import numpy as np
 
 def read_feature_from_h5(file_path):
@@ -2,13 +2,10 @@ import os
 import sys
 import numpy as np
 import soundfile
-import librosa
 import h5py
 import math
 import pandas as pd
-from sklearn import metrics
 import logging
-import matplotlib.pyplot as plt
 
 from vad import activity_detection
 import config
@@ -58,6 +55,7 @@ def read_audio(audio_path, target_fs=None):
         audio = np.mean(audio, axis=1)
         
     if target_fs is not None and fs != target_fs:
+        import librosa     # Imported lazily, only needed for resampling
         audio = librosa.resample(audio, orig_sr=fs, target_sr=target_fs)
         fs = target_fs
         
@@ -81,7 +79,14 @@ def get_relative_path_no_extension(data_type):
         raise Exception('Incorrect data_type!')
     
     
-def pad_truncate_sequence(x, max_len):
+def pad_truncate_sequence(x, max_len, out=None):
+    if out is not None:
+        # Pad or truncate into a preallocated (max_len,) buffer
+        length = min(len(x), max_len)
+        out[0 : length] = x[0 : length]
+        out[length :] = 0
+        return out
+        
     if len(x) < max_len:
         return np.concatenate((x, np.zeros(max_len - len(x))))
     else:
@@ -113,6 +118,52 @@ def calculate_scalar_of_tensor(x):
     return mean, std
 
 
+def calculate_scalar_of_dataset(dataset):
+    '''Calculate mean and std of a hdf5 dataset without loading it into 
+    memory. Slices along the first axis are read one chunk at a time and 
+    merged with the parallel variance algorithm of Chan et al. Reduces over 
+    the same axes as calculate_scalar_of_tensor. 
+    
+    Args:
+      dataset: h5py dataset, (samples_num, ...)
+      
+    Returns:
+      mean: float | (feature_dims,)
+      std: float | (feature_dims,)
+    '''
+    if dataset.ndim == 2:
+        axis = 0
+    elif dataset.ndim == 3:
+        axis = (0, 1)
+    else:
+        axis = None
+
+    if dataset.chunks is None:
+        step = 1
+    else:
+        step = dataset.chunks[0]
+        
+    count = 0
+    mean = 0.
+    m2 = 0.
+    
+    for begin in range(0, dataset.shape[0], step):
+        x = dataset[begin : begin + step].astype(np.float64)
+        
+        x_mean = np.mean(x, axis=axis)
+        x_count = x.size // np.size(x_mean)
+        x_m2 = np.sum((x - x_mean) ** 2, axis=axis)
+        
+        delta = x_mean - mean
+        total = count + x_count
+        mean = mean + delta * x_count / total
+        m2 = m2 + x_m2 + delta ** 2 * count * x_count / total
+        count = total
+        
+    std = np.sqrt(m2 / count)
+    
+    return mean, std
+
 
 def load_scalar(scalar_path):
     with h5py.File(scalar_path, 'r') as hf: